@@ -1,25 +1,32 @@
 
 import time
+import json
 import random
+import asyncio
 import logging
+from utils.clock import iso_now
 from typing import List, Optional
 from fastapi import APIRouter, Header, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from models.schemas import (
-    RequestBody, HoneypotResponse, EngagementMetrics, ExtractedIntelligence,
-    Message
+    RequestBody, HoneypotResponse, EngagementMetrics, ExtractedIntelligence
 )
 from core.security import verify_api_key
-from services.intelligence_extractor import extract_intelligence, merge_extracted
+from services.intelligence_extractor import (
+    extract_intelligence, accumulate_extracted, merge_extracted
+)
+from services.reply_cache import reply_cache
 from services.scam_detector import (
-    is_scam, extract_behavioral_signals, detect_repetition, 
-    detect_instruction_pattern, decide_phase, calculate_confidence,
+    analyze_message, detect_repetition, decide_phase, calculate_confidence,
     Phase
 )
 from services.gemini_service import GeminiService
+from services.gemini_batcher import GeminiBatcher
 from config import (
-    SAFE_FALLBACKS, TRUST_PHASE_REPLIES, CONFUSION_REPLIES, 
-    EXTRACTION_REPLIES, CONTEXT_EXTRACTION, HUMAN_VARIANTS, 
-    DELAY_REPLIES, MIN_CONFIDENCE_THRESHOLD
+    SAFE_FALLBACKS, FALLBACK_BY_PHASE, CONFUSION_REPLIES,
+    CONTEXT_EXTRACTION, HUMAN_VARIANTS,
+    DELAY_REPLIES, MIN_CONFIDENCE_THRESHOLD, GEMINI_REPLY_TIMEOUT,
+    HISTORY_ANALYSIS_WINDOW
 )
 
 router = APIRouter()
@@ -27,10 +34,100 @@ logger = logging.getLogger("api.honeypot")
 
 # Initialize Gemini Service once
 gemini_service = GeminiService()
+gemini_batcher = GeminiBatcher(gemini_service)
+
+# Dedicated PRNG instance: avoids contending the random module's global
+# singleton under concurrent workers
+_rng = random.Random()
+
+# Emergency responses prebuilt at import: the error path must not depend on
+# fresh allocation/validation succeeding right when things are already bad
+_ERROR_RESPONSES = tuple(
+    HoneypotResponse(
+        status="error",
+        scamDetected=True,
+        phase=Phase.CONFUSION,
+        confidence=0.5,
+        behavioralSignals={},
+        instructionPattern="general_instruction",
+        engagementMetrics=EngagementMetrics(),
+        extractedIntelligence=ExtractedIntelligence(),
+        agentReply=reply,
+        agentNotes="Emergency fallback due to internal error"
+    )
+    for reply in CONFUSION_REPLIES
+)
+
+def _pick_reply(phase: Phase, instruction: Optional[str], history_len: int) -> str:
+    """
+    Table-driven fallback reply selection.
+    One pool lookup plus a single random draw covering both entropy gates
+    (clarification variants and EXIT-phase stalling).
+    """
+    if phase == Phase.EXTRACTION and instruction in CONTEXT_EXTRACTION:
+        pool = CONTEXT_EXTRACTION[instruction]
+    else:
+        pool = FALLBACK_BY_PHASE.get(phase.value, SAFE_FALLBACKS["CONFUSION"])
+    reply = _rng.choice(pool)
+
+    # Single draw: low tail adds clarification entropy, high tail stalls on EXIT
+    roll = _rng.random()
+    if history_len >= 2 and roll < 0.15:
+        reply = _rng.choice(HUMAN_VARIANTS)
+    elif phase == Phase.EXIT and roll >= 0.9:
+        reply = _rng.choice(DELAY_REPLIES)
+    return reply
+
+async def _analyze_request(body: RequestBody):
+    """
+    Shared analysis pipeline for the blocking and streaming routes.
+    Validates input, runs the independent detection stages concurrently,
+    and determines the conversation phase.
+    """
+    # --- INPUT VALIDATION & SANITIZATION ---
+    last_message = str(body.message.text).strip()
+    history = body.conversationHistory or []
+    history_len = len(history)
+
+    if not last_message:
+        logger.warning("Empty message received")
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+
+    logger.info(f"Processing message from {body.message.sender} | History: {history_len}")
+
+    # Normalize history to plain text once; Pydantic already coerced
+    # every entry to Message, so no per-item type dispatch is needed.
+    history_texts = [msg.text or "" for msg in history]
+
+    # One case fold per request, threaded through every analyzer
+    last_lower = last_message.lower()
+
+    # --- INDEPENDENT ANALYSIS STAGES (CONCURRENT) ---
+    # The three per-message detectors share one worker dispatch; extraction
+    # over the current message and the history window run alongside them
+    (current_extracted, historical_extracted,
+     (behavioral, instruction, scam_detected)) = await asyncio.gather(
+        asyncio.to_thread(extract_intelligence, last_message),
+        asyncio.to_thread(accumulate_extracted,
+                          history_texts[-HISTORY_ANALYSIS_WINDOW:]),
+        asyncio.to_thread(analyze_message, last_message, last_lower),
+    )
+
+    # Merge current with historical
+    extracted_dict = merge_extracted(historical_extracted, current_extracted)
+    behavioral["repetition"] = detect_repetition(history_texts, last_message,
+                                                 text_lower=last_lower)
+
+    # --- CONVERSATION PHASE DETERMINATION ---
+    phase = decide_phase(history_len, extracted_dict, behavioral, instruction)
+    logger.info(f"Phase determined: {phase}")
+
+    return (last_message, history_texts, history_len, extracted_dict,
+            behavioral, instruction, scam_detected, phase)
 
 @router.post("/agentic-honeypot", response_model=HoneypotResponse, tags=["Honeypot"])
 async def agentic_honeypot(
-    body: RequestBody, 
+    body: RequestBody,
     x_api_key: str = Depends(verify_api_key)
 ):
     """
@@ -38,84 +135,37 @@ async def agentic_honeypot(
     Analyzes incoming message, detects scam indicators, and generates contextual response.
     """
     start_time = time.time()
-    
-    try:
-        # --- INPUT VALIDATION & SANITIZATION ---
-        last_message = str(body.message.text).strip()
-        history = body.conversationHistory or []
-        history_len = len(history)
-        
-        if not last_message:
-            logger.warning("Empty message received")
-            raise HTTPException(status_code=400, detail="Message cannot be empty")
 
-        logger.info(f"Processing message from {body.message.sender} | History: {history_len}")
+    try:
+        (last_message, history_texts, history_len, extracted_dict,
+         behavioral, instruction, scam_detected, phase) = await _analyze_request(body)
 
-        # --- INTELLIGENCE EXTRACTION (ACCUMULATED) ---
-        current_extracted = extract_intelligence(last_message)
-        
-        # Accumulate from history
-        historical_extracted = {}
-        for msg in history:
-            text_content = msg.text if isinstance(msg, Message) else str(msg.get("text", ""))
-            old_extracted = extract_intelligence(text_content)
-            for k, v in old_extracted.items():
-                if k not in historical_extracted:
-                    historical_extracted[k] = []
-                historical_extracted[k].extend(v)
-
-        # Merge current with historical
-        extracted_dict = merge_extracted(historical_extracted, current_extracted)
-        
-        # --- BEHAVIORAL SIGNAL DETECTION ---
-        behavioral = extract_behavioral_signals(last_message)
-        behavioral["repetition"] = detect_repetition(history, last_message)
-        
-        # --- INSTRUCTION PATTERN DETECTION ---
-        instruction = detect_instruction_pattern(last_message)
-        
-        # --- SCAM DETECTION ---
-        scam_detected = is_scam(last_message)
-        
-        # --- CONVERSATION PHASE DETERMINATION ---
-        phase = decide_phase(history_len, extracted_dict, behavioral, instruction)
-        logger.info(f"Phase determined: {phase}")
-        
         # --- RESPONSE GENERATION ---
-        history_text = [
-            m.text if isinstance(m, Message) else str(m.get("text", "")) 
-            for m in history
-        ]
-        
-        # 1. Try Gemini
-        agent_reply = gemini_service.generate_response(
-            phase.value, instruction, extracted_dict, history_text
-        )
+        # 1. Local routing: TRUST openers and EXIT stalls are formulaic and
+        # the template pools cover them; only the nuanced middle phases
+        # justify an LLM round-trip. Cached replies are tried before Gemini.
+        agent_reply = None
+        if phase in (Phase.CONFUSION, Phase.EXTRACTION):
+            cache_key = reply_cache.make_key(phase.value, instruction, extracted_dict, last_message)
+            agent_reply = reply_cache.get(cache_key)
+            if agent_reply is None:
+                try:
+                    agent_reply = await asyncio.wait_for(
+                        gemini_batcher.submit(
+                            phase.value, instruction, extracted_dict, history_texts
+                        ),
+                        timeout=GEMINI_REPLY_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning("Gemini reply timed out, degrading to fallback")
+                    agent_reply = None
+                if agent_reply:
+                    reply_cache.put(cache_key, agent_reply)
         
         # 2. Fallback if Gemini fails or is disabled
         if not agent_reply:
             logger.info("Using fallback response logic")
-            if phase == Phase.EXTRACTION and instruction in CONTEXT_EXTRACTION:
-                candidates = CONTEXT_EXTRACTION[instruction]
-                agent_reply = random.choice(candidates)
-            elif phase == Phase.CONFUSION:
-                agent_reply = random.choice(CONFUSION_REPLIES)
-            elif phase == Phase.EXTRACTION:
-                agent_reply = random.choice(EXTRACTION_REPLIES)
-            elif phase == Phase.TRUST:
-                agent_reply = random.choice(TRUST_PHASE_REPLIES)
-            else:
-                # Default fallback based on phase
-                fallback_list = SAFE_FALLBACKS.get(phase.value, SAFE_FALLBACKS["CONFUSION"])
-                agent_reply = random.choice(fallback_list)
-            
-            # Add entropy - occasionally ask for clarification
-            if random.random() < 0.15 and history_len >= 2:
-                agent_reply = random.choice(HUMAN_VARIANTS)
-            
-            # Add delay response occasionally for EXIT phase
-            if random.random() < 0.1 and phase == Phase.EXIT:
-                agent_reply = random.choice(DELAY_REPLIES)
+            agent_reply = _pick_reply(phase, instruction, history_len)
         
         # Final safety check
         if not agent_reply or len(agent_reply) < 2:
@@ -130,20 +180,22 @@ async def agentic_honeypot(
         processing_time = time.time() - start_time
         
         # --- CONSTRUCT RESPONSE ---
-        return HoneypotResponse(
+        # Every field below is produced internally and already within its
+        # constraints, so model_construct skips redundant re-validation
+        return HoneypotResponse.model_construct(
             status="success",
             scamDetected=scam_detected,
             phase=phase,
             confidence=confidence,
             behavioralSignals=behavioral,
             instructionPattern=instruction,
-            engagementMetrics=EngagementMetrics(
+            engagementMetrics=EngagementMetrics.model_construct(
                 totalMessagesExchanged=total_messages,
                 engagementDurationSeconds=est_duration,
                 averageResponseTime=est_duration / total_messages if total_messages > 0 else 0,
                 sessionId=body.metadata.channel
             ),
-            extractedIntelligence=ExtractedIntelligence(
+            extractedIntelligence=ExtractedIntelligence.model_construct(
                 bankAccounts=extracted_dict.get("bankAccounts", []),
                 upiIds=extracted_dict.get("upiIds", []),
                 phishingLinks=extracted_dict.get("phishingLinks", []),
@@ -152,23 +204,65 @@ async def agentic_honeypot(
                 otherPatterns=extracted_dict.get("otherPatterns", {})
             ),
             agentReply=agent_reply,
-            agentNotes=f"Phase:{phase.value} | Scam:{scam_detected} | Confidence:{confidence:.2f} | ProcessTime:{processing_time:.3f}s"
+            agentNotes=f"Phase:{phase.value} | Scam:{scam_detected} | Confidence:{confidence:.2f} | ProcessTime:{processing_time:.3f}s",
+            timestamp=iso_now()
         )
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"CRITICAL ERROR: {e}", exc_info=True)
-        # Graceful Failure Mode
-        return HoneypotResponse(
-            status="error",
-            scamDetected=True,
-            phase=Phase.CONFUSION,
-            confidence=0.5,
-            behavioralSignals={},
-            instructionPattern="general_instruction",
-            engagementMetrics=EngagementMetrics(),
-            extractedIntelligence=ExtractedIntelligence(),
-            agentReply=random.choice(CONFUSION_REPLIES),
-            agentNotes="Emergency fallback due to internal error"
+        # Graceful Failure Mode: reuse a prebuilt response, only refreshing
+        # the timestamp (model_copy skips validation entirely)
+        fallback = _ERROR_RESPONSES[int(time.time()) % len(_ERROR_RESPONSES)]
+        return fallback.model_copy(update={"timestamp": iso_now()})
+
+@router.post("/agentic-honeypot/stream", tags=["Honeypot"])
+async def agentic_honeypot_stream(
+    body: RequestBody,
+    x_api_key: str = Depends(verify_api_key)
+):
+    """
+    Streaming variant of the honeypot endpoint (Server-Sent Events).
+    Emits the analysis fields as the first frame, then agentReply chunks
+    as Gemini produces them, so the client sees the first token without
+    waiting for the full generation.
+    """
+    (last_message, history_texts, history_len, extracted_dict,
+     behavioral, instruction, scam_detected, phase) = await _analyze_request(body)
+
+    confidence = calculate_confidence(extracted_dict, behavioral, history_len, instruction)
+
+    async def event_stream():
+        meta = {
+            "status": "success",
+            "scamDetected": scam_detected,
+            "phase": phase.value,
+            "confidence": confidence,
+            "behavioralSignals": behavioral,
+            "instructionPattern": instruction,
+            "extractedIntelligence": {
+                k: v for k, v in extracted_dict.items() if k != "otherPatterns"
+            }
+        }
+        yield f"data: {json.dumps(meta)}\n\n"
+
+        streamed = False
+        chunks = gemini_service.stream_response(
+            phase.value, instruction, extracted_dict, history_texts
         )
+        while True:
+            # Pull the sync Gemini stream from a thread so the loop stays free
+            piece = await asyncio.to_thread(next, chunks, None)
+            if piece is None:
+                break
+            streamed = True
+            yield f"data: {json.dumps({'agentReply': piece})}\n\n"
+
+        if not streamed:
+            reply = _pick_reply(phase, instruction, history_len)
+            yield f"data: {json.dumps({'agentReply': reply})}\n\n"
+
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,5 +1,6 @@
 
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,15 +12,32 @@ API_VERSION = "2.0.0"
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8080))
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+WORKERS = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
 
 # --- GEMINI CONFIGURATION ---
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 GEMINI_MODEL = "models/gemini-flash-latest"
+GEMINI_BATCH_MAX = 16
+GEMINI_BATCH_WINDOW_MS = 20
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", 600))
+GEMINI_TIMEOUT_MS = int(os.getenv("GEMINI_TIMEOUT_MS", 30000))
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", 16))
+GEMINI_MAX_RETRIES = 3
+GEMINI_REPLY_TIMEOUT = float(os.getenv("GEMINI_REPLY_TIMEOUT", 8.0))
 
 # --- SCAM DETECTION CONFIGURATION ---
 MAX_HISTORY_LENGTH = 50
 MIN_CONFIDENCE_THRESHOLD = 0.3
+# Only this many most-recent history messages are re-scanned for
+# intelligence per request; older turns were already scanned when they
+# arrived, and the memoized extractor keeps their results hot anyway
+HISTORY_ANALYSIS_WINDOW = int(os.getenv("HISTORY_ANALYSIS_WINDOW", 10))
+
+# --- REPLY CACHE CONFIGURATION ---
+REPLY_CACHE_SIZE = 4096
+REPLY_CACHE_TTL = int(os.getenv("REPLY_CACHE_TTL", 3600))
+REPLY_CACHE_VARIANTS = int(os.getenv("REPLY_CACHE_VARIANTS", 3))
 
 # --- FALLBACK RESPONSES ---
 SAFE_FALLBACKS = {
@@ -93,6 +111,14 @@ CONTEXT_EXTRACTION = {
     ]
 }
 
+# Precomputed phase -> fallback pool mapping (single lookup on the fallback path)
+FALLBACK_BY_PHASE = {
+    "TRUST": TRUST_PHASE_REPLIES,
+    "CONFUSION": CONFUSION_REPLIES,
+    "EXTRACTION": EXTRACTION_REPLIES,
+    "EXIT": SAFE_FALLBACKS["EXIT"]
+}
+
 HUMAN_VARIANTS = [
     "where should I type this",
     "where do I put this",
@@ -109,3 +135,16 @@ DELAY_REPLIES = [
     "Sir my phone battery is very low",
     "Someone just came home, will contact you soon"
 ]
+
+# Intern every canned reply and context key once at load. The pools are
+# mutated in place so aliases (e.g. FALLBACK_BY_PHASE) keep pointing at
+# the same list objects; repeat strings then share one interned object.
+for _pool in (TRUST_PHASE_REPLIES, CONFUSION_REPLIES, EXTRACTION_REPLIES,
+              HUMAN_VARIANTS, DELAY_REPLIES):
+    _pool[:] = [sys.intern(s) for s in _pool]
+for _pool in SAFE_FALLBACKS.values():
+    _pool[:] = [sys.intern(s) for s in _pool]
+CONTEXT_EXTRACTION = {
+    sys.intern(k): [sys.intern(v) for v in vs]
+    for k, vs in CONTEXT_EXTRACTION.items()
+}
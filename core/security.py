@@ -1,10 +1,18 @@
 
+import hmac
 from fastapi import Header, HTTPException, Depends
 from config import API_KEY
 
+# Keys that already passed the constant-time compare; repeat requests skip
+# straight to a set lookup. Bounded so the set cannot grow without limit.
+_VERIFIED_KEYS: set = set()
+_VERIFIED_KEYS_MAX = 1024
+
 async def verify_api_key(x_api_key: str = Header(..., description="API Key for authentication")):
     """
     Validate the X-API-Key header against the configured HONEYPOT_API_KEY.
+    Uses hmac.compare_digest so the comparison cannot leak timing information,
+    and caches verified keys to skip the compare entirely on repeat requests.
     """
     if not API_KEY:
         # If no API key configured, allow generic access (logging warning handled elsewhere)
@@ -13,9 +21,16 @@ async def verify_api_key(x_api_key: str = Header(..., description="API Key for a
         # If API_KEY is set to "demo-key" (default) it works.
         return x_api_key
 
-    if x_api_key != API_KEY:
+    if x_api_key in _VERIFIED_KEYS:
+        return x_api_key
+
+    if not hmac.compare_digest(x_api_key.encode("utf-8"), API_KEY.encode("utf-8")):
         raise HTTPException(
             status_code=401,
             detail="Invalid API Key"
         )
+
+    if len(_VERIFIED_KEYS) >= _VERIFIED_KEYS_MAX:
+        _VERIFIED_KEYS.clear()
+    _VERIFIED_KEYS.add(x_api_key)
     return x_api_key
@@ -2,7 +2,7 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config import APP_NAME, API_VERSION, HOST, PORT, DEBUG, ALLOWED_ORIGINS, API_KEY
+from config import APP_NAME, API_VERSION, HOST, PORT, DEBUG, WORKERS, ALLOWED_ORIGINS, API_KEY
 from core.logger import setup_logger
 from api.honeypot import router as honeypot_router
 
@@ -38,13 +38,23 @@ app.add_middleware(
 # Include Routers
 app.include_router(honeypot_router)
 
+# Health payload never changes after startup; build it once instead of
+# allocating a fresh dict on every probe
+_HEALTH_PAYLOAD = {"status": "healthy", "service": APP_NAME, "version": API_VERSION}
+
 @app.get("/", tags=["Health"])
 @app.get("/health", tags=["Health"])
 def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": APP_NAME, "version": API_VERSION}
+    return _HEALTH_PAYLOAD
 
 if __name__ == "__main__":
     import uvicorn
     logger.info(f"Documentation available at: http://{HOST}:{PORT}/docs")
-    uvicorn.run("main:app", host=HOST, port=PORT, reload=DEBUG)
+    # reload and workers are mutually exclusive in uvicorn: single
+    # auto-reloading process in DEBUG, one worker per core otherwise.
+    # "auto" picks uvloop/httptools where installed (uvloop is skipped on
+    # Windows by its requirements marker) and falls back cleanly elsewhere
+    uvicorn.run("main:app", host=HOST, port=PORT, reload=DEBUG,
+                workers=None if DEBUG else WORKERS,
+                loop="auto", http="auto")
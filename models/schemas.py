@@ -1,13 +1,13 @@
 
 from typing import List, Dict, Optional, Any
-from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from utils.phases import Phase
+from utils.clock import iso_now
 
 class Message(BaseModel):
     sender: str = Field(default="unknown")
     text: str = Field(...)
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: str = Field(default_factory=iso_now)
 
 class Metadata(BaseModel):
     channel: str = Field(default="unknown")
@@ -22,6 +22,8 @@ class RequestBody(BaseModel):
 
 class EngagementMetrics(BaseModel):
     """Metrics tracking scammer engagement."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     engagementDurationSeconds: int = Field(default=0, ge=0)
     totalMessagesExchanged: int = Field(default=0, ge=0)
     averageResponseTime: float = Field(default=0.0, ge=0.0)
@@ -29,6 +31,8 @@ class EngagementMetrics(BaseModel):
 
 class ExtractedIntelligence(BaseModel):
     """Extracted sensitive information from messages."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     bankAccounts: List[str] = Field(default_factory=list)
     upiIds: List[str] = Field(default_factory=list)
     phishingLinks: List[str] = Field(default_factory=list)
@@ -38,6 +42,8 @@ class ExtractedIntelligence(BaseModel):
 
 class HoneypotResponse(BaseModel):
     """API response with comprehensive scam analysis."""
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     status: str = Field(default="success")
     scamDetected: bool
     phase: Phase = Field(description="Current conversation phase (TRUST, CONFUSION, EXTRACTION, EXIT)")
@@ -48,4 +54,4 @@ class HoneypotResponse(BaseModel):
     instructionPattern: Optional[str] = Field(default=None)
     agentReply: str = Field(description="Generated response to continue engagement")
     agentNotes: str = Field(description="Internal analysis notes")
-    timestamp: str = Field(default_factory=lambda: datetime.now().isoformat())
+    timestamp: str = Field(default_factory=iso_now)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+from config import GEMINI_BATCH_MAX, GEMINI_BATCH_WINDOW_MS, GEMINI_CONCURRENCY
+from services.gemini_service import GeminiService
+
+logger = logging.getLogger("gemini_batcher")
+
+class GeminiBatcher:
+    """
+    Coalesces concurrent Gemini calls into micro-batches.
+    Pending prompts accumulate for a short window (or until the batch is
+    full) and are then dispatched together via asyncio.gather, so burst
+    traffic amortizes scheduling overhead instead of serializing on the
+    event loop.
+    """
+
+    def __init__(self, service: GeminiService,
+                 batch_max: int = GEMINI_BATCH_MAX,
+                 window_ms: int = GEMINI_BATCH_WINDOW_MS):
+        self.service = service
+        self.batch_max = batch_max
+        self.window = window_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def submit(self, phase: str, instruction: Optional[str],
+                     extracted: dict, history_text: List[str]) -> Optional[str]:
+        """
+        Queue a generation request and wait for its batched result.
+        Returns None immediately when Gemini is disabled so callers fall
+        through to the rule-based engine without queueing overhead.
+        """
+        if not self.service.is_active:
+            return None
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((future, (phase, instruction, extracted, history_text)))
+        return await future
+
+    def _ensure_worker(self) -> None:
+        """Lazily start the background dispatch task on the running loop."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._semaphore = asyncio.Semaphore(GEMINI_CONCURRENCY)
+            self._worker = asyncio.ensure_future(self._dispatch_loop())
+
+    async def _call(self, args: tuple) -> Optional[str]:
+        """Run one generation in a worker thread, bounded by the semaphore."""
+        async with self._semaphore:
+            return await asyncio.to_thread(self.service.generate_response, *args)
+
+    async def _dispatch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[asyncio.Future, tuple]] = [await self._queue.get()]
+            deadline = loop.time() + self.window
+
+            # Accumulate until the batch fills or the window closes
+            while len(batch) < self.batch_max:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            if len(batch) > 1:
+                logger.info(f"Dispatching Gemini micro-batch of {len(batch)}")
+
+            # Fire the batch off as its own task and go straight back to
+            # collecting: awaiting it here would stall every later batch
+            # behind the slowest in-flight call. The semaphore in _call
+            # already bounds total concurrency across batches.
+            asyncio.ensure_future(self._dispatch_batch(batch))
+
+    async def _dispatch_batch(self, batch: List[Tuple[asyncio.Future, tuple]]) -> None:
+        # Drop entries whose caller already gave up (wait_for cancelled the
+        # future) before the call is made, so overload doesn't keep burning
+        # quota and rate-limit budget on answers nobody is waiting for
+        live = [(future, args) for future, args in batch if not future.done()]
+        if not live:
+            return
+
+        results = await asyncio.gather(
+            *[self._call(args) for _, args in live],
+            return_exceptions=True
+        )
+        for (future, _), result in zip(live, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                logger.error(f"Batched Gemini call failed: {result}")
+                future.set_result(None)
+            else:
+                future.set_result(result)
@@ -1,22 +1,56 @@
 
 import os
+import time
+import random
 import logging
-from typing import Optional, List
-from config import GEMINI_API_KEY, GEMINI_MODEL
+from typing import Optional, List, Iterator
+from config import (
+    GEMINI_API_KEY, GEMINI_MODEL, GEMINI_CACHE_TTL, GEMINI_TIMEOUT_MS,
+    GEMINI_MAX_RETRIES
+)
 
 logger = logging.getLogger("gemini_service")
 
+# Static portion of the prompt, identical on every call. Kept separate from
+# the dynamic tail so it can live in a server-side Gemini context cache and
+# stop being re-sent (and re-billed) on every turn.
+ROLE_PREAMBLE = """
+You are playing the role of a naive, non-technical, slightly older potential victim in a scam conversation.
+Your goal is to waste the scammer's time without exposing that you are a bot.
+NEVER admit you are an AI. NEVER refuse to help directly, but always have a problem doing it.
+
+Guidelines:
+- If Phase is TRUST: Be agreeable, polite, eagerness to resolve the issue.
+- If Phase is CONFUSION: Misunderstand technical terms (e.g., confuse 'browser' with 'gallery', 'UPI' with 'message').
+- If Phase is EXTRACTION: Act willing but incompetent. Fumble the details. Ask if you should do X or Y (both wrong).
+- If Phase is EXIT: Stall. Battery low, network slow, someone at door.
+
+Respond with a single short message (under 20 words). Act natural, use slightly broken grammar or older person mannerisms.
+"""
+
 class GeminiService:
     def __init__(self):
         self.client = None
         self.is_active = False
-        
+        self.cached_content = None
+
         if GEMINI_API_KEY:
             try:
                 from google import genai
-                self.client = genai.Client(api_key=GEMINI_API_KEY)
+                # One long-lived client for the whole process: the SDK keeps a
+                # persistent pooled HTTP transport per Client instance, so every
+                # call after the first reuses the warm TLS connection.
+                try:
+                    self.client = genai.Client(
+                        api_key=GEMINI_API_KEY,
+                        http_options={"timeout": GEMINI_TIMEOUT_MS}
+                    )
+                except TypeError:
+                    # Older google-genai without http_options support
+                    self.client = genai.Client(api_key=GEMINI_API_KEY)
                 self.is_active = True
                 logger.info("Gemini client initialized successfully")
+                self._init_context_cache()
             except ImportError:
                 logger.error("google-genai package not installed. Gemini disabled.")
             except Exception as e:
@@ -24,6 +58,80 @@ class GeminiService:
         else:
             logger.warning("GEMINI_API_KEY not found. Gemini disabled.")
 
+    def _init_context_cache(self):
+        """
+        Push the static role preamble into a server-side context cache so each
+        call only sends (and bills) the dynamic tail. Degrades to the inline
+        prompt if context caching is unavailable for the model/account.
+        """
+        try:
+            cache = self.client.caches.create(
+                model=GEMINI_MODEL,
+                config={
+                    "system_instruction": ROLE_PREAMBLE,
+                    "ttl": f"{GEMINI_CACHE_TTL}s"
+                }
+            )
+            self.cached_content = cache.name
+            logger.info(f"Gemini context cache created: {cache.name}")
+        except Exception as e:
+            logger.warning(f"Context caching unavailable, using inline prompt: {e}")
+            self.cached_content = None
+
+    def _build_context(self, phase: str, instruction: str, extracted: dict, history_text: List[str]) -> str:
+        """Dynamic per-turn portion of the prompt."""
+        return f"""
+        Context:
+        - Current Phase: {phase} (TRUST=Agreement, CONFUSION=Don't understand technical terms, EXTRACTION=Asked for info, EXIT=Stalling)
+        - Scammer Instruction: {instruction or "General conversation"}
+        - What we know about them: {extracted}
+        - Recent Conversation: {history_text[-5:] if history_text else "No history"}
+        """
+
+    def stream_response(self, phase: str, instruction: str, extracted: dict, history_text: List[str]) -> Iterator[str]:
+        """
+        Yield response text chunks as Gemini produces them.
+        Yields nothing if the service is inactive or generation fails, so
+        callers can detect the empty stream and fall back.
+        """
+        if not self.is_active or not self.client:
+            return
+
+        try:
+            context = self._build_context(phase, instruction, extracted, history_text)
+            if self.cached_content:
+                stream = self.client.models.generate_content_stream(
+                    model=GEMINI_MODEL,
+                    contents=context,
+                    config={"cached_content": self.cached_content}
+                )
+            else:
+                stream = self.client.models.generate_content_stream(
+                    model=GEMINI_MODEL,
+                    contents=ROLE_PREAMBLE + context
+                )
+
+            # Replies are capped at 150 chars (see generate_response); once
+            # the cap is reached, stop pulling so the model stops generating
+            emitted = 0
+            for chunk in stream:
+                if not chunk.text:
+                    continue
+                piece = chunk.text
+                if emitted + len(piece) >= 150:
+                    yield piece[:150 - emitted]
+                    break
+                emitted += len(piece)
+                yield piece
+
+        except Exception as e:
+            if self.cached_content and self._is_cache_miss(e):
+                # Recreate for the next call; this one falls back empty
+                logger.info("Gemini context cache expired, recreating")
+                self._init_context_cache()
+            else:
+                logger.error(f"Gemini streaming error with model {GEMINI_MODEL}: {e}")
+
     def generate_response(self, phase: str, instruction: str, extracted: dict, history_text: List[str]) -> Optional[str]:
         """
         Generate a human-like response using Gemini.
@@ -32,45 +140,63 @@ class GeminiService:
         if not self.is_active or not self.client:
             return None
 
-        try:
-            prompt = f"""
-            You are playing the role of a naive, non-technical, slightly older potential victim in a scam conversation.
-            Your goal is to waste the scammer's time without exposing that you are a bot.
-            NEVER admit you are an AI. NEVER refuse to help directly, but always have a problem doing it.
-
-            Context:
-            - Current Phase: {phase} (TRUST=Agreement, CONFUSION=Don't understand technical terms, EXTRACTION=Asked for info, EXIT=Stalling)
-            - Scammer Instruction: {instruction or "General conversation"}
-            - What we know about them: {extracted}
-            - Recent Conversation: {history_text[-5:] if history_text else "No history"}
-
-            Guidelines:
-            - If Phase is TRUST: Be agreeable, polite, eagerness to resolve the issue.
-            - If Phase is CONFUSION: Misunderstand technical terms (e.g., confuse 'browser' with 'gallery', 'UPI' with 'message').
-            - If Phase is EXTRACTION: Act willing but incompetent. Fumble the details. Ask if you should do X or Y (both wrong).
-            - If Phase is EXIT: Stall. Battery low, network slow, someone at door.
-
-            Respond with a single short message (under 20 words). Act natural, use slightly broken grammar or older person mannerisms.
-            """
-            
-            # Using the v1alpha or similar API from google-genai
-            # The user code used: client.models.generate_content(model="...", contents=prompt)
-            # We will follow that pattern.
-            
-            response = self.client.models.generate_content(
-                model=GEMINI_MODEL,
-                contents=prompt
-            )
-            
-            if response and response.text:
-                text = response.text.replace('"', '').strip()
-                # Clean up any potential prefixes like "Response:"
-                if text.lower().startswith("response:"):
-                    text = text[9:].strip()
-                return text[:150] # Limit length to prevent rambling
-            
-            return None
+        context = self._build_context(phase, instruction, extracted, history_text)
 
-        except Exception as e:
-            logger.error(f"Gemini generation error with model {GEMINI_MODEL}: {e}")
-            return None
+        # Using the v1alpha or similar API from google-genai
+        # The user code used: client.models.generate_content(model="...", contents=prompt)
+        # We will follow that pattern.
+
+        for attempt in range(GEMINI_MAX_RETRIES):
+            try:
+                if self.cached_content:
+                    response = self.client.models.generate_content(
+                        model=GEMINI_MODEL,
+                        contents=context,
+                        config={"cached_content": self.cached_content}
+                    )
+                else:
+                    response = self.client.models.generate_content(
+                        model=GEMINI_MODEL,
+                        contents=ROLE_PREAMBLE + context
+                    )
+
+                if response and response.text:
+                    text = response.text.replace('"', '').strip()
+                    # Clean up any potential prefixes like "Response:"
+                    if text.lower().startswith("response:"):
+                        text = text[9:].strip()
+                    return text[:150] # Limit length to prevent rambling
+
+                return None
+
+            except Exception as e:
+                if self.cached_content and self._is_cache_miss(e):
+                    # Server-side cache expired past its TTL; recreate it and
+                    # retry (or fall through to the inline prompt if that fails)
+                    logger.info("Gemini context cache expired, recreating")
+                    self._init_context_cache()
+                    if attempt < GEMINI_MAX_RETRIES - 1:
+                        continue
+                if self._is_rate_limit(e) and attempt < GEMINI_MAX_RETRIES - 1:
+                    # Exponential backoff with jitter; runs on a worker thread,
+                    # so sleeping here does not block the event loop
+                    delay = min(8, 2 ** attempt) + random.random()
+                    logger.warning(f"Gemini rate limited, retrying in {delay:.1f}s")
+                    time.sleep(delay)
+                    continue
+                logger.error(f"Gemini generation error with model {GEMINI_MODEL}: {e}")
+                return None
+
+        return None
+
+    @staticmethod
+    def _is_rate_limit(error: Exception) -> bool:
+        """Heuristic 429 detection across google-genai error types."""
+        message = str(error)
+        return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+    @staticmethod
+    def _is_cache_miss(error: Exception) -> bool:
+        """Detect a reference to a context cache the server no longer holds."""
+        message = str(error)
+        return "CachedContent" in message or "cachedContent" in message or "CACHED_CONTENT" in message
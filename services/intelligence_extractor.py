@@ -1,43 +1,120 @@
 
 import re
 import logging
+from functools import lru_cache
+from itertools import chain
 from typing import Dict, List, Any
 
-# Enhanced regex patterns with better accuracy
+# Optional DFA regex engine: linear-time scans with no backtracking.
+# google-re2 mirrors the re API, so the compiled patterns below are
+# engine-agnostic; stdlib re is the fallback when it is not installed.
+try:
+    import re2 as _regex
+except ImportError:
+    _regex = re
+
+# Enhanced regex patterns with better accuracy. Only syntax both engines
+# support is used (re2 has no lookaround), so boundaries are spelled with \b.
 UPI_REGEX = r"\b[a-zA-Z0-9][a-zA-Z0-9.\-_]*@[a-zA-Z]{2,}\b"
 BANK_REGEX = r"\b\d{9,18}\b"
-URL_REGEX = r"https?://[^\s]+"
-EMAIL_REGEX = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-PHONE_REGEX = r"\b(?:\+91|91|0)?[6-9]\d{9}\b"
+# Bounded repetition stops a single unbroken blob from producing a
+# multi-megabyte "URL"; quote/angle characters end the match like whitespace
+URL_REGEX = r"https?://[^\s<>\"']{1,2048}"
+# The old TLD class [A-Z|a-z] accidentally admitted a literal pipe
+EMAIL_REGEX = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b"
+# \b never matches before '+', so the old leading \b made the +91 branch
+# unreachable; the boundary belongs inside the bare-prefix branch only
+PHONE_REGEX = r"(?:\+91|\b(?:91|0)?)[6-9]\d{9}\b"
+
+# Compiled once at import so per-message calls skip pattern parsing/cache lookups
+UPI_RE = _regex.compile(UPI_REGEX, re.IGNORECASE)
+BANK_RE = _regex.compile(BANK_REGEX)
+URL_RE = _regex.compile(URL_REGEX)
+EMAIL_RE = _regex.compile(EMAIL_REGEX)
+PHONE_RE = _regex.compile(PHONE_REGEX)
 
 logger = logging.getLogger("intelligence_extractor")
 
+# Shortest text any pattern can match is a 4-char UPI handle ("a@bc");
+# anything shorter cannot contain intelligence, so skip all five scans
+_MIN_MATCHABLE_LEN = 4
+
+_EXTRACTION_KEYS = ("upiIds", "bankAccounts", "phishingLinks",
+                    "emailAddresses", "phoneNumbers")
+
+# Obvious dummy numbers scammers paste as examples; matching them only
+# pollutes the accumulated intelligence
+_PLACEHOLDER_NUMBERS = frozenset({
+    "0000000000", "1234567890", "9999999999",
+    "000000000000", "123456789012",
+})
+
+def _empty_result() -> Dict[str, Any]:
+    """Fresh empty extraction dict; callers mutate results, so no sharing."""
+    result: Dict[str, Any] = {k: [] for k in _EXTRACTION_KEYS}
+    result["otherPatterns"] = {}
+    return result
+
 def extract_intelligence(text: str) -> Dict[str, Any]:
     """
     Extract all sensitive information from text using multiple pattern matching.
     Returns a comprehensive dictionary of extracted data.
     """
-    if not text or len(text.strip()) == 0:
-        return {
-            "upiIds": [], "bankAccounts": [], "phishingLinks": [],
-            "emailAddresses": [], "phoneNumbers": [], "otherPatterns": {}
-        }
-    
-    result = {
-        "upiIds": list(set(re.findall(UPI_REGEX, text, re.IGNORECASE))),
-        "bankAccounts": list(set(re.findall(BANK_REGEX, text))),
-        "phishingLinks": list(set(re.findall(URL_REGEX, text))),
-        "emailAddresses": list(set(re.findall(EMAIL_REGEX, text))),
-        "phoneNumbers": list(set(re.findall(PHONE_REGEX, text))),
-        "otherPatterns": {}
-    }
+    if not text or len(text) < _MIN_MATCHABLE_LEN or not text.strip():
+        return _empty_result()
+
+    # Each pattern requires a literal the text may lack entirely: '@' for
+    # UPI/email, 'http' for links, any digit for bank/phone. These gates are
+    # exact (a match without the literal is impossible), so a typical chat
+    # line runs zero regex scans instead of five.
+    has_at = "@" in text
+    has_http = "http" in text
+    has_digit = any(ch.isdigit() for ch in text)
+
+    # finditer avoids materializing an intermediate match list, and
+    # dict.fromkeys dedups while keeping first-seen order (set() scrambled it)
+    result = _empty_result()
+    if has_at:
+        result["upiIds"] = list(dict.fromkeys(
+            m.group() for m in UPI_RE.finditer(text)))
+        result["emailAddresses"] = list(dict.fromkeys(
+            m.group() for m in EMAIL_RE.finditer(text)))
+    if has_http:
+        result["phishingLinks"] = list(dict.fromkeys(
+            m.group() for m in URL_RE.finditer(text)))
+    if has_digit:
+        result["bankAccounts"] = list(dict.fromkeys(
+            m.group() for m in BANK_RE.finditer(text)
+            if m.group() not in _PLACEHOLDER_NUMBERS))
+        result["phoneNumbers"] = list(dict.fromkeys(
+            m.group() for m in PHONE_RE.finditer(text)
+            if m.group().lstrip("+") not in _PLACEHOLDER_NUMBERS))
     
     # Log extraction if anything found
-    if any(result[k] for k in ["upiIds", "bankAccounts", "phishingLinks", "emailAddresses", "phoneNumbers"]):
+    if any(result[k] for k in _EXTRACTION_KEYS):
         logger.info(f"Intelligence extracted: {result}")
     
     return result
 
+@lru_cache(maxsize=4096)
+def _extract_cached(text: str) -> tuple:
+    """Hashable (key, matches) snapshot of extract_intelligence for memoization."""
+    result = extract_intelligence(text)
+    return tuple((k, tuple(v)) for k, v in result.items() if k != "otherPatterns")
+
+def accumulate_extracted(texts: List[str]) -> Dict[str, Any]:
+    """
+    Accumulate extraction results across a list of messages.
+    Works directly on the memoized tuple snapshots, skipping the per-message
+    dict materialization the handler loop used to pay for.
+    """
+    accumulated: Dict[str, Any] = {}
+    for text in texts:
+        for k, matches in _extract_cached(text):
+            if matches:
+                accumulated.setdefault(k, []).extend(matches)
+    return accumulated
+
 def merge_extracted(history_data: dict, current_data: dict) -> dict:
     """
     Merge extracted intelligence from conversation history with current message.
@@ -45,7 +122,8 @@ def merge_extracted(history_data: dict, current_data: dict) -> dict:
     """
     merged = {}
     
-    for k in set(history_data.keys()) | set(current_data.keys()):
+    # Dict views support set union directly; no intermediate sets needed
+    for k in history_data.keys() | current_data.keys():
         val1 = history_data.get(k)
         val2 = current_data.get(k)
         
@@ -56,16 +134,10 @@ def merge_extracted(history_data: dict, current_data: dict) -> dict:
             merged[k] = {**d1, **d2}
             continue
             
-        # Default/List merging strategy
+        # Default/List merging strategy: accumulation is append-only, so
+        # dedup happens exactly once here via an order-preserving dict pass
         l1 = val1 if isinstance(val1, list) else []
         l2 = val2 if isinstance(val2, list) else []
-        
-        seen = set()
-        result = []
-        for item in (l1 + l2):
-            if item not in seen:
-                result.append(item)
-                seen.add(item)
-        merged[k] = result
+        merged[k] = list(dict.fromkeys(chain(l1, l2)))
 
     return merged
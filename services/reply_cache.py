@@ -0,0 +1,87 @@
+import re
+import time
+import random
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional
+from config import REPLY_CACHE_SIZE, REPLY_CACHE_TTL, REPLY_CACHE_VARIANTS
+
+logger = logging.getLogger("reply_cache")
+
+# Strips everything but letters, digits, @ and whitespace so lightly-mutated
+# variants of the same lure ("send OTP now" / "send otp now.") collapse into
+# one bucket before hashing
+_NORMALIZE_RE = re.compile(r"[^a-z0-9@\s]+")
+
+class ReplyCache:
+    """
+    In-process LRU cache with TTL for generated agent replies.
+    Keyed on a truncated SHA-256 of the conversation signature so that
+    repeat (phase, instruction, extracted-signature) turns skip the Gemini
+    round-trip entirely.
+    """
+
+    def __init__(self, maxsize: int = REPLY_CACHE_SIZE, ttl: int = REPLY_CACHE_TTL,
+                 variants: int = REPLY_CACHE_VARIANTS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.variants = variants
+        self._store: OrderedDict = OrderedDict()
+        self._rng = random.Random()
+
+    @staticmethod
+    def make_key(phase: str, instruction: Optional[str], extracted: dict, last_message: str) -> str:
+        """
+        Build a stable cache key from the conversation signature.
+        The last message is normalized (case, whitespace, punctuation) and
+        bucketed so near-duplicate variants of the same lure hit one entry.
+        """
+        bucket = " ".join(_NORMALIZE_RE.sub("", last_message.lower()).split())[:64]
+        signature = "|".join([
+            phase,
+            instruction or "",
+            ",".join(sorted(k for k, v in extracted.items() if v)),
+            bucket
+        ])
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return a cached reply for key, or None on miss/expiry.
+        When several variants are stored, one is drawn at random so a
+        scammer repeating the same lure does not see a verbatim echo.
+        """
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        replies, stored_at = entry
+        if time.time() - stored_at > self.ttl:
+            del self._store[key]
+            return None
+        self._store.move_to_end(key)
+        return self._rng.choice(replies)
+
+    def put(self, key: str, reply: str) -> None:
+        """
+        Store a generated reply, evicting the least-recently-used entry if
+        full. Up to `variants` distinct replies accumulate per key; the TTL
+        clock restarts on each addition.
+        """
+        entry = self._store.get(key)
+        if entry is not None:
+            replies = entry[0]
+            if reply not in replies and len(replies) < self.variants:
+                replies = replies + [reply]
+            self._store[key] = (replies, time.time())
+        else:
+            self._store[key] = ([reply], time.time())
+        self._store.move_to_end(key)
+        if len(self._store) > self.maxsize:
+            self._store.popitem(last=False)
+
+    def clear(self) -> None:
+        self._store.clear()
+
+# Shared instance used by the honeypot endpoint
+reply_cache = ReplyCache()
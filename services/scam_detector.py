@@ -1,43 +1,50 @@
 
-from typing import List, Optional, Dict
-from models.schemas import Message
+import re
+from types import MappingProxyType
+from typing import List, Optional, Dict, Sequence
 from utils.phases import Phase
 from config import MIN_CONFIDENCE_THRESHOLD
 
-BEHAVIORAL_KEYWORDS = {
-    "urgency": [
-        "immediately", "urgent", "now", "blocked", "fast", "quick", 
+# Keyword tables are read-only at runtime: tuples and mapping proxies make
+# that explicit, catch accidental mutation, and let the interpreter share
+# the structures freely across workers
+BEHAVIORAL_KEYWORDS = MappingProxyType({
+    "urgency": (
+        "immediately", "urgent", "now", "blocked", "fast", "quick",
         "do it now", "asap", "right now", "straight away"
-    ],
-    "authorityImpersonation": [
+    ),
+    "authorityImpersonation": (
         "bank", "support", "customer care", "police", "cbi", "rbi", "officer",
         "government", "official", "representative", "executive", "manager"
-    ],
-    "fearInduction": [
+    ),
+    "fearInduction": (
         "blocked", "suspended", "legal", "penalty", "arrest", "fine",
         "account closure", "action", "complaint", "notice", "violation"
-    ],
-    "socialEngineering": [
+    ),
+    "socialEngineering": (
         "help", "support", "guide", "please", "need your", "can you",
         "do me a favor", "trusted", "secure"
-    ],
-    "technicalPretext": [
+    ),
+    "technicalPretext": (
         "update", "software", "system", "security", "bug", "issue",
         "maintenance", "verification", "confirm"
-    ]
-}
+    )
+})
 
-INSTRUCTION_PATTERNS = {
-    "ask_for_upi_id": ["upi id", "@", "vpa", "upi address", "send upi"],
-    "ask_for_otp": ["otp", "one time password", "verification code"],
-    "ask_for_link_click": ["click", "link", "url", "open", "visit", "download"],
-    "ask_for_app_install": ["install", "download", "apk", "anydesk", "teamviewer", "app"],
-    "ask_for_bank_details": ["account number", "ifsc", "bank details", "account info"],
-    "ask_for_credentials": ["username", "email", "password", "login details"],
-    "ask_for_cvv": ["cvv", "cvc", "security code", "card number"]
-}
+# Ordered by how often each ask shows up in real engagements (OTP and
+# link lures dominate); order doubles as the tie-break priority when a
+# message matches several categories
+INSTRUCTION_PATTERNS = MappingProxyType({
+    "ask_for_otp": ("otp", "one time password", "verification code"),
+    "ask_for_link_click": ("click", "link", "url", "open", "visit", "download"),
+    "ask_for_upi_id": ("upi id", "@", "vpa", "upi address", "send upi"),
+    "ask_for_app_install": ("install", "download", "apk", "anydesk", "teamviewer", "app"),
+    "ask_for_bank_details": ("account number", "ifsc", "bank details", "account info"),
+    "ask_for_credentials": ("username", "email", "password", "login details"),
+    "ask_for_cvv": ("cvv", "cvc", "security code", "card number")
+})
 
-SCAM_TERMS = [
+SCAM_TERMS = (
     "blocked", "suspended", "verify", "urgent", "immediate",
     "upi", "account", "refund", "claim", "winner",
     "click", "link", "update", "confirm", "password", "otp",
@@ -45,102 +52,182 @@ SCAM_TERMS = [
     "bank", "verify identity", "pending", "pending approval",
     "transaction failed", "network issue", "settlement",
     "kyc", "aadhar", "pan", "secure", "official"
-]
+)
+
+def _alternation(keywords: Sequence[str]) -> "re.Pattern":
+    """
+    Fuse a keyword list into one compiled alternation. No word boundaries:
+    the original detectors used plain substring checks, and that semantics
+    (e.g. 'confirm' hitting 'confirmation') is preserved. Longest-first
+    ordering keeps multi-word phrases from being shadowed by their prefixes.
+    """
+    return re.compile("|".join(map(re.escape, sorted(keywords, key=len, reverse=True))))
+
+# One C-level scan per keyword group instead of dozens of Python `in` checks
+BEHAVIORAL_RES = {signal: _alternation(kws) for signal, kws in BEHAVIORAL_KEYWORDS.items()}
+INSTRUCTION_RES = {pattern: _alternation(kws) for pattern, kws in INSTRUCTION_PATTERNS.items()}
+SCAM_RE = _alternation(SCAM_TERMS)
+
+# All instruction categories fused into one pattern; the named group that
+# fired identifies the category, so one scan replaces seven.
+_INSTRUCTION_COMBINED = re.compile("|".join(
+    "(?P<%s>%s)" % (name, "|".join(map(re.escape, sorted(kws, key=len, reverse=True))))
+    for name, kws in INSTRUCTION_PATTERNS.items()
+))
+# Declaration order is the category priority order
+_INSTRUCTION_PRIORITY = {name: i for i, name in enumerate(INSTRUCTION_PATTERNS)}
+
+# Fast-reject filter: every character trigram occurring in any scam term.
+# If a message shares no trigram with the term set, no term can be a
+# substring of it, so the full scan is skipped entirely.
+_SCAM_TRIGRAMS = frozenset(
+    term[i:i + 3] for term in SCAM_TERMS for i in range(len(term) - 2)
+)
 
-def is_scam(text: str) -> bool:
+def is_scam(text: str, text_lower: Optional[str] = None) -> bool:
     """
     Detect if message contains common scam indicators.
     Uses multi-factor detection for higher accuracy.
+    Accepts a pre-lowercased copy so callers analyzing the same message
+    several ways fold case only once.
     """
     if not text or len(text.strip()) < 3:
         return False
-    
-    text = text.lower()
-    
-    # Count matching terms (threshold-based)
-    matches = sum(1 for term in SCAM_TERMS if term in text)
-    
-    return matches >= 1  # At least one scam indicator
 
-def detect_repetition(history: List[Message], text: str, threshold: int = 3) -> bool:
+    text = text_lower if text_lower is not None else text.lower()
+
+    # Trigram fast reject: most benign messages bail out here
+    if not any(text[i:i + 3] in _SCAM_TRIGRAMS for i in range(len(text) - 2)):
+        return False
+
+    # Single alternation scan; stops at the first matching term
+    return SCAM_RE.search(text) is not None
+
+def scam_score(text: str, text_lower: Optional[str] = None) -> int:
+    """
+    Count how many distinct scam terms appear in the message.
+    is_scam stops at the first hit; callers that want a graded signal
+    (e.g. ranking or thresholding) get the full count from here, behind
+    the same trigram fast-reject.
+    """
+    if not text or len(text.strip()) < 3:
+        return 0
+
+    text = text_lower if text_lower is not None else text.lower()
+
+    if not any(text[i:i + 3] in _SCAM_TRIGRAMS for i in range(len(text) - 2)):
+        return 0
+
+    return sum(1 for term in SCAM_TERMS if term in text)
+
+def detect_repetition(history_texts: List[str], text: str, threshold: int = 3,
+                      text_lower: Optional[str] = None) -> bool:
     """
     Detect if the same instruction is being repeated.
     Indicates scammer frustration or victim hesitation.
+    Operates on the plain text column extracted once at request entry,
+    so no Message attribute access happens in the scan.
     """
-    if not text or len(history) == 0:
+    if not text or not history_texts:
         return False
-    
-    text_lower = text.lower().strip()
-    
-    # Check for exact or near-exact repetition
+
+    text_lower = (text_lower if text_lower is not None else text.lower()).strip()
+
+    # Lowercase per message: only the threshold-bounded tail is scanned,
+    # and a shared-buffer trick would let a message containing the
+    # separator count as several repetitions
     repetition_count = sum(
-        1 for msg in history[-threshold:]
-        if text_lower in (msg.text or "").lower()
+        1 for prior in history_texts[-threshold:]
+        if text_lower in prior.lower()
     )
-    
+
     return repetition_count >= 2
 
-def extract_behavioral_signals(text: str) -> dict:
+def extract_behavioral_signals(text: str, text_lower: Optional[str] = None) -> dict:
     """
     Detect behavioral signals indicating scam attempt.
     Returns a dictionary of detected behavioral patterns.
     """
     if not text:
         return {}
-    
-    text_lower = text.lower()
+
+    if text_lower is None:
+        text_lower = text.lower()
     signals = {}
     
-    for signal, keywords in BEHAVIORAL_KEYWORDS.items():
-        signals[signal] = any(k in text_lower for k in keywords)
-    
+    for signal, pattern in BEHAVIORAL_RES.items():
+        signals[signal] = pattern.search(text_lower) is not None
+
     return signals
 
-def detect_instruction_pattern(text: str) -> Optional[str]:
+def detect_instruction_pattern(text: str, text_lower: Optional[str] = None) -> Optional[str]:
     """
     Identify what the scammer is trying to extract.
     Returns the detected instruction pattern or None.
     """
     if not text:
         return None
-    
-    text_lower = text.lower()
-    
-    # Check for multiple matches and return the first (priority-ordered)
-    for pattern, keywords in INSTRUCTION_PATTERNS.items():
-        if any(k in text_lower for k in keywords) and len(text_lower.split()) > 3:
-            return pattern
-    
-    return "general_instruction"
 
-def decide_phase(history_len: int, extracted: dict, behavioral: dict, instruction: Optional[str]) -> Phase:
+    if text_lower is None:
+        text_lower = text.lower()
+
+    # Word-count gate hoisted out of the scan; maxsplit bounds the
+    # allocation to four tokens regardless of message length
+    if len(text_lower.split(None, 3)) <= 3:
+        return "general_instruction"
+
+    # Single combined scan; leftmost hit is not necessarily the
+    # highest-priority category, so keep the best ordinal seen
+    best = None
+    best_rank = len(_INSTRUCTION_PRIORITY)
+    for match in _INSTRUCTION_COMBINED.finditer(text_lower):
+        rank = _INSTRUCTION_PRIORITY[match.lastgroup]
+        if rank < best_rank:
+            best, best_rank = match.lastgroup, rank
+            if rank == 0:
+                break
+
+    return best or "general_instruction"
+
+def analyze_message(text: str, text_lower: Optional[str] = None):
     """
-    Determine conversation phase based on escalation logic.
+    Run all three per-message detectors over a single case fold.
+    Returns (behavioral_signals, instruction_pattern, is_scam) so callers
+    dispatch one unit of work instead of three.
+    """
+    if text_lower is None:
+        text_lower = text.lower()
+    return (
+        extract_behavioral_signals(text, text_lower),
+        detect_instruction_pattern(text, text_lower),
+        is_scam(text, text_lower),
+    )
+
+def _decide_phase_rules(history_len: int, has_instruction: bool, has_targets: bool,
+                        urgency: bool, fear: bool, repetition: bool) -> Phase:
+    """
+    Escalation rules for the conversation phase. Only evaluated at import
+    time to populate the dispatch table below.
     """
 
     # 1. EXIT conditions (highest priority)
-    if behavioral.get("repetition") and history_len >= 4:
+    if repetition and history_len >= 4:
         return Phase.EXIT
 
-    if behavioral.get("urgency") and history_len >= 4:
+    if urgency and history_len >= 4:
         return Phase.EXIT
 
     if history_len >= 10:
         return Phase.EXIT
 
     # 2. EXTRACTION phase (instruction or sensitive ask detected)
-    if instruction and instruction != "general_instruction":
+    if has_instruction:
         return Phase.EXTRACTION
 
-    extraction_targets = (
-        extracted.get("upiIds", []) +
-        extracted.get("bankAccounts", []) +
-        extracted.get("emailAddresses", [])
-    )
-    if extraction_targets:
+    if has_targets:
         return Phase.EXTRACTION
 
-    if behavioral.get("urgency") or behavioral.get("fearInduction"):
+    if urgency or fear:
         return Phase.EXTRACTION if history_len >= 2 else Phase.CONFUSION
 
     # 3. TRUST phase (ONLY very first interaction)
@@ -150,35 +237,83 @@ def decide_phase(history_len: int, extracted: dict, behavioral: dict, instructio
     # 4. Default
     return Phase.CONFUSION
 
+# History length only matters through the ==0 / >=2 / >=4 / >=10 thresholds,
+# so it discretizes into five buckets; the remaining inputs are booleans.
+# Every combination is enumerated once here, turning decide_phase into a
+# single dict lookup per request.
+_HLEN_REPRESENTATIVE = (0, 1, 2, 4, 10)
+_FLAGS = (False, True)
+_PHASE_TABLE = {
+    (bucket, instr, targets, urg, fear, rep):
+        _decide_phase_rules(_HLEN_REPRESENTATIVE[bucket], instr, targets, urg, fear, rep)
+    for bucket in range(5)
+    for instr in _FLAGS
+    for targets in _FLAGS
+    for urg in _FLAGS
+    for fear in _FLAGS
+    for rep in _FLAGS
+}
+
+def _hlen_bucket(history_len: int) -> int:
+    if history_len == 0:
+        return 0
+    if history_len < 2:
+        return 1
+    if history_len < 4:
+        return 2
+    if history_len < 10:
+        return 3
+    return 4
+
+def decide_phase(history_len: int, extracted: dict, behavioral: dict, instruction: Optional[str]) -> Phase:
+    """
+    Determine conversation phase based on escalation logic.
+    Resolved via the precomputed dispatch table: one key build plus one
+    dict lookup instead of the branch cascade.
+    """
+    key = (
+        _hlen_bucket(history_len),
+        bool(instruction and instruction != "general_instruction"),
+        bool(extracted.get("upiIds") or extracted.get("bankAccounts")
+             or extracted.get("emailAddresses")),
+        bool(behavioral.get("urgency")),
+        bool(behavioral.get("fearInduction")),
+        bool(behavioral.get("repetition"))
+    )
+    return _PHASE_TABLE[key]
+
+# Behavioral signal weights for confidence scoring, applied in order
+_SIGNAL_WEIGHTS = (
+    ("urgency", 0.15),
+    ("fearInduction", 0.1),
+    ("authorityImpersonation", 0.1),
+    ("technicalPretext", 0.05),
+)
+
 def calculate_confidence(extracted: dict, behavioral: dict, history_len: int, instruction: Optional[str]) -> float:
     """
     Calculate confidence score (0.0-1.0) that message is a scam attempt.
     Uses multi-factor scoring.
     """
     score = 0.5
-    
+
     # Factor 1: Extracted sensitive info
     extracted_count = sum(len(v) for v in extracted.values())
     if extracted_count > 0:
         score += min(0.15 * extracted_count, 0.2)
-    
-    # Factor 2: Behavioral signals
-    if behavioral.get("urgency"):
-        score += 0.15
-    if behavioral.get("fearInduction"):
-        score += 0.1
-    if behavioral.get("authorityImpersonation"):
-        score += 0.1
-    if behavioral.get("technicalPretext"):
-        score += 0.05
-    
+
+    # Factor 2: Behavioral signals, weight table instead of a branch ladder
+    for signal, weight in _SIGNAL_WEIGHTS:
+        if behavioral.get(signal):
+            score += weight
+
     # Factor 3: Instruction pattern
     if instruction and instruction != "general_instruction":
         score += 0.1
-    
+
     # Factor 4: Conversation depth
     if history_len >= 5:
         score += 0.05
-    
+
     # Ensure score is valid probability
     return max(MIN_CONFIDENCE_THRESHOLD, min(score, 0.99))
@@ -0,0 +1,19 @@
+import time
+from datetime import datetime
+
+# (epoch second, formatted string) pair shared by all callers; every
+# timestamp taken within the same second reuses one formatted string.
+_cached = (0, "")
+
+def iso_now() -> str:
+    """
+    ISO-8601 timestamp at second granularity.
+    datetime.now().isoformat() allocates a datetime and formats it on every
+    call; this caches the formatted string per wall-clock second, which is
+    plenty of resolution for message/response timestamps.
+    """
+    global _cached
+    second = int(time.time())
+    if second != _cached[0]:
+        _cached = (second, datetime.fromtimestamp(second).isoformat())
+    return _cached[1]